@@ -1,9 +1,10 @@
 # backend/fix_db.py
+import os
 import psycopg2
 
 try:
     print("🔧 Connecting to Database...")
-    conn = psycopg2.connect("dbname=styledb user=postgres password=postgres")
+    conn = psycopg2.connect(os.environ.get("DATABASE_URL", "dbname=styledb user=postgres password=postgres"))
     conn.autocommit = True
     cur = conn.cursor()
 
@@ -28,6 +29,19 @@ try:
     except Exception as e:
         print(f"Note on constraint: {e}")
 
+    # 5. Full-text column for the lexical leg of /search/text
+    # 'simple' config = no English stemming, so 'chikankari', 'co-ord' and brand names match as typed
+    print("Checking 'search_tsv' column + GIN index...")
+    cur.execute("""
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(vendor, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED;
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS products_search_tsv_idx ON products USING GIN (search_tsv);")
+
     print("✅ Database patched successfully!")
     conn.close()
 
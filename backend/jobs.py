@@ -0,0 +1,185 @@
+# backend/jobs.py
+import os
+import time
+import uuid
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from backend.metrics import CACHE_EVENTS, BOARD_JOBS_PENDING, SLOW_REQUEST_SECONDS, start_request, format_breakdown
+
+# Each worker drives its own headless Chrome, so keep this small
+PINTEREST_WORKERS = int(os.environ.get("PINTEREST_WORKERS", "2"))
+# Beyond this many queued/running boards, new ones are turned away (429) instead of waiting forever
+PINTEREST_MAX_PENDING = int(os.environ.get("PINTEREST_MAX_PENDING", "20"))
+# How long a board's pins + vibe vector are reused before it gets scraped again
+BOARD_CACHE_TTL_SECONDS = float(os.environ.get("BOARD_CACHE_TTL_SECONDS", "3600"))
+# How long finished jobs stay pollable
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", "600"))
+
+
+class BoardJobError(Exception):
+    """A board that can't be turned into recommendations (private, no usable images...)."""
+
+    def __init__(self, message, status_code=422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class QueueFull(Exception):
+    """Too many boards already queued or running."""
+
+
+def board_key(board_url):
+    """'https://www.Pinterest.com/user/board/?invite=x' and '.../user/board' are the same board."""
+    parts = urlsplit(board_url.strip())
+    host = parts.netloc.lower().replace("www.", "")
+    return f"{host}{parts.path.rstrip('/').lower()}"
+
+
+class Job:
+    def __init__(self, board_url):
+        self.id = uuid.uuid4().hex
+        self.board_url = board_url
+        self.status = "queued"  # queued -> running -> done | failed
+        self.cached = False
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.spans = None  # this job's own stage() timings, once a worker picks it up
+        self.stages = {}   # stage name -> total seconds, e.g. {"browser_scrape": 8.1, "image_download": 2.3}
+        self.finished = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def to_dict(self):
+        data = {
+            "job_id": self.id,
+            "board_url": self.board_url,
+            "status": self.status,
+            "cached": self.cached,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "stages": self.stages,
+        }
+        if self.status == "done":
+            data["result"] = self.result
+        if self.status == "failed":
+            data["error"] = self.error
+        return data
+
+
+class BoardJobs:
+    """
+    Runs Pinterest board recommendations on a bounded worker pool.
+
+    compute_vibe(board_url) -> {"pins": [...], "vibe_vector": ...} is the slow
+    part (scrape + download + embed), so it is cached per board for
+    BOARD_CACHE_TTL_SECONDS and concurrent submissions of the same board share
+    one job. recommend(vibe) -> result dict is the cheap search, re-run every
+    time so results follow the current index.
+    """
+
+    def __init__(self, compute_vibe, recommend):
+        self.compute_vibe = compute_vibe
+        self.recommend = recommend
+        self.pool = ThreadPoolExecutor(max_workers=PINTEREST_WORKERS)
+        self.lock = threading.Lock()
+        self.jobs = {}      # job id -> Job
+        self.inflight = {}  # board key -> Job still queued/running
+        self.cache = {}     # board key -> (expires_at, vibe)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def submit(self, board_url):
+        """Returns the Job for this board: answered from cache, joined, or newly queued."""
+        key = board_key(board_url)
+        now = time.time()
+
+        with self.lock:
+            self._prune(now)
+
+            cached = self.cache.get(key)
+            if cached and cached[0] > now:
+                CACHE_EVENTS.labels("pinterest_board", "hit").inc()
+                job = self._new_job(board_url)
+                job.cached = True
+                vibe = cached[1]
+            elif key in self.inflight:
+                CACHE_EVENTS.labels("pinterest_board", "coalesced").inc()
+                return self.inflight[key]
+            else:
+                CACHE_EVENTS.labels("pinterest_board", "miss").inc()
+                if len(self.inflight) >= PINTEREST_MAX_PENDING:
+                    raise QueueFull(f"{len(self.inflight)} boards already in progress, try again shortly")
+                job = self._new_job(board_url)
+                self.inflight[key] = job
+                BOARD_JOBS_PENDING.set(len(self.inflight))
+                self.pool.submit(self._run, job, key)
+                return job
+
+        # Cache hit: only the (fast) search is left, no point queueing behind slow boards
+        self._finish(job, vibe)
+        return job
+
+    def _new_job(self, board_url):
+        job = Job(board_url)
+        self.jobs[job.id] = job
+        return job
+
+    def _run(self, job, key):
+        # The submitting request has long returned, so the job collects its own spans
+        job.spans = start_request()
+        job.status = "running"
+        try:
+            vibe = self.compute_vibe(job.board_url)
+            with self.lock:
+                self.cache[key] = (time.time() + BOARD_CACHE_TTL_SECONDS, vibe)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            self._finish(job, vibe)
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+                BOARD_JOBS_PENDING.set(len(self.inflight))
+
+    def _finish(self, job, vibe):
+        try:
+            job.result = self.recommend(vibe)
+            job.status = "done"
+        except Exception as e:
+            self._fail(job, e)
+            return
+        self._close(job)
+
+    def _fail(self, job, e):
+        print(f"❌ Board job {job.id} failed: {e}")
+        job.error = str(e)
+        job.error_status = getattr(e, "status_code", 500)
+        job.status = "failed"
+        self._close(job)
+
+    def _close(self, job):
+        job.finished_at = time.time()
+        if job.spans is not None:
+            totals = {}
+            for name, seconds in job.spans:
+                totals[name] = totals.get(name, 0.0) + seconds
+            job.stages = {name: round(seconds, 3) for name, seconds in totals.items()}
+            elapsed = job.finished_at - job.created_at
+            if elapsed >= SLOW_REQUEST_SECONDS:
+                print(f"🐢 Slow board job {job.id}: {job.board_url} -> {job.status} in {elapsed:.2f}s | {format_breakdown(job.spans)}")
+        # Last, so anyone woken up sees the stages too
+        job.finished.set()
+
+    def _prune(self, now):
+        # Called with the lock held
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and now - j.finished_at > JOB_RETENTION_SECONDS]:
+            del self.jobs[job_id]
+        for key in [k for k, (expires_at, _) in self.cache.items() if expires_at <= now]:
+            del self.cache[key]
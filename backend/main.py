@@ -12,7 +12,14 @@ from ml.vibe import get_average_embedding, get_text_embedding
 # Without this, PyTorch and FAISS will crash the app instantly.
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-from fastapi import FastAPI
+import json
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -22,13 +29,21 @@ from pydantic import BaseModel
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ml.vibe import get_average_embedding
 
-# Now it is safe to load FAISS
-import faiss
-import pickle
-import numpy as np
+# Now it is safe to load FAISS (backend.shards imports it)
+from backend.shards import load_coordinator, ShardUnavailable
+from backend.search import lexical_search, reciprocal_rank_fusion, fetch_products, timed
+from backend.metrics import stage, start_request, finish_request, render_metrics
+from backend.jobs import BoardJobs, BoardJobError, QueueFull
 
 app = FastAPI()
 
+# Runs the visual (CLIP + FAISS) and lexical (Postgres full-text) legs of
+# /search/text side by side, so the slower one sets the latency, not the sum.
+search_pool = ThreadPoolExecutor(max_workers=8)
+
+# How many candidates each leg hands to the rank fusion step
+HYBRID_DEPTH = 50
+
 # --- CORS: ALLOW EVERYONE ---
 app.add_middleware(
     CORSMiddleware,
@@ -36,21 +51,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser client read the shard / timing headers, not just curl and devtools
+    expose_headers=["X-Shards", "X-Shard-Latency", "X-Shards-Failed", "Server-Timing"],
 )
 
+# --- LATENCY TRACKING ---
+# Every request gets a span list; stage() calls anywhere below (download,
+# CLIP, FAISS, DB...) land in it. Slow requests print the breakdown.
+@app.middleware("http")
+async def track_latency(request: Request, call_next):
+    spans = start_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template ('/brands/{brand_name}'), not the raw path, to keep label counts small
+        route = request.scope.get("route")
+        endpoint = route.path if route else "unmatched"
+        finish_request(request.method, endpoint, status, time.perf_counter() - start, spans)
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+def api_error(status_code, message):
+    """Same {"error": ...} body the frontend reads, but with a real status code."""
+    return JSONResponse(status_code=status_code, content={"error": message})
+
+def add_shard_headers(response, report):
+    """Shows the index fan-out to clients without changing the list-shaped bodies."""
+    response.headers["X-Shards"] = f"{report['answered']}/{report['total']}"
+    if report["latency_ms"]:
+        response.headers["X-Shard-Latency"] = ", ".join(f"{name}={ms}ms" for name, ms in report["latency_ms"].items())
+    if report["failed"]:
+        response.headers["X-Shards-Failed"] = ", ".join(f"{name}={why}" for name, why in report["failed"].items())
+
 # Load AI Memory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-INDEX_PATH = os.path.join(BASE_DIR, "style.index")
-IDS_PATH = os.path.join(BASE_DIR, "ids.pkl")
+# Where build_index.py was run (override to serve an index built elsewhere, e.g. by the benchmarks)
+INDEX_DIR = os.environ.get("STYLE_INDEX_DIR", BASE_DIR)
 
-index = None
-ids_map = {}
+# One index, local shards (build_index.py --shards N) or remote shard workers (STYLE_SHARDS).
+# Every search goes through the coordinator either way.
+print("⏳ Loading AI Memory...")
+coordinator = load_coordinator(INDEX_DIR)
 
-if os.path.exists(INDEX_PATH):
-    print("⏳ Loading AI Memory...")
-    index = faiss.read_index(INDEX_PATH)
-    with open(IDS_PATH, "rb") as f:
-        ids_map = pickle.load(f)
+if coordinator is not None:
+    for shard in coordinator.describe():
+        print(f"   {shard}")
     print("✅ Ready.")
 else:
     print("❌ ERROR: style.index not found. Please run 'python ml/build_index.py'")
@@ -59,8 +111,8 @@ class SearchRequest(BaseModel):
     image_url: str
 
 @app.post("/search")
-def search_similar(req: SearchRequest):
-    if index is None: return {"error": "AI Index not loaded"}
+def search_similar(req: SearchRequest, response: Response):
+    if coordinator is None: return api_error(503, "AI Index not loaded")
     
     print(f"🔍 Visual Search for: {req.image_url}")
     
@@ -68,35 +120,23 @@ def search_similar(req: SearchRequest):
     query_vec = get_average_embedding([req.image_url])
     
     if query_vec is None:
-        return {"error": "Could not download image."}
+        return api_error(422, "Could not download image.")
     
     # 2. Search FAISS
     try:
-        D, I = index.search(np.array([query_vec]).astype('float32'), k=10)
+        hits, shard_report = coordinator.search(query_vec, k=10)
+        add_shard_headers(response, shard_report)
         
         # 3. Resolve IDs
-        found_db_ids = []
-        scores = {}
+        scores = dict(hits)
         
-        for i, idx in enumerate(I[0]):
-            if idx in ids_map:
-                db_id = ids_map[idx]
-                found_db_ids.append(db_id)
-                scores[db_id] = float(D[0][i])
-        
-        if not found_db_ids:
+        if not scores:
             return []
 
         # 4. Fetch FULL Details from Database
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
         # We select everything (*) so you get Title, Price, Image, Vendor, Description...
-        placeholders = ",".join(["%s"] * len(found_db_ids))
-        query = f"SELECT * FROM products WHERE id IN ({placeholders})"
-        
-        cur.execute(query, tuple(found_db_ids))
-        products = cur.fetchall()
+        conn = get_db_connection()
+        products = fetch_products(conn, list(scores))
         conn.close()
         
         # 5. Attach Scores & Sort
@@ -110,71 +150,113 @@ def search_similar(req: SearchRequest):
         
         return final_results
 
+    except ShardUnavailable as e:
+        return api_error(503, str(e))
     except Exception as e:
-        return {"error": str(e)}
+        print(f"❌ {e}")
+        return api_error(500, str(e))
 
 # backend/main.py (Add to bottom)
 
 class TextSearchRequest(BaseModel):
     query: str
 
+def _visual_text_leg(query):
+    """CLIP text vector vs image index. Returns ([(product_id, score)], shard_report) or None."""
+    query_vec = get_text_embedding(query)
+    if query_vec is None:
+        return None
+    # This works because CLIP maps "Red Dress" text to the same math spot as a Red Dress photo!
+    try:
+        return coordinator.search(query_vec, k=HYBRID_DEPTH)
+    except ShardUnavailable as e:
+        # The lexical leg can still answer on its own; the report marks the response 0/N
+        print(f"⚠️ Visual search skipped: {e}")
+        return [], e.report
+
+def _lexical_text_leg(query):
+    """Postgres full-text over title/description/vendor. Never fails the request."""
+    try:
+        conn = get_db_connection()
+        try:
+            return lexical_search(conn, query, k=HYBRID_DEPTH)
+        finally:
+            conn.close()
+    except Exception as e:
+        # e.g. fix_db.py hasn't been run yet, so 'search_tsv' is missing
+        print(f"⚠️ Lexical search skipped: {e}")
+        return []
+
 @app.post("/search/text")
-def search_by_text(req: TextSearchRequest):
-    if index is None: return {"error": "AI Index not loaded"}
+def search_by_text(req: TextSearchRequest, response: Response):
+    if coordinator is None: return api_error(503, "AI Index not loaded")
 
     print(f"📝 Searching for text: '{req.query}'")
 
-    # 1. Convert Text to Vector
-    query_vec = get_text_embedding(req.query)
-
-    if query_vec is None: 
-        return {"error": "Could not understand text."}
+    # 1. Run both retrievers at the same time
+    # (copy_context so their stage() timings still land on this request)
+    visual_job = search_pool.submit(contextvars.copy_context().run, timed, _visual_text_leg, req.query)
+    lexical_job = search_pool.submit(contextvars.copy_context().run, timed, _lexical_text_leg, req.query)
 
-    # 2. Search FAISS (Compare Text Vector vs Image Database)
-    # This works because CLIP maps "Red Dress" text to the same math spot as a Red Dress photo!
     try:
-        D, I = index.search(np.array([query_vec]).astype('float32'), k=10)
+        visual, visual_ms = visual_job.result()
+        lexical_hits, lexical_ms = lexical_job.result()
 
-        # 3. Fetch Results from DB (Reusing the same logic)
-        found_db_ids = []
-        scores = {}
-        for i, idx in enumerate(I[0]):
-            if idx in ids_map:
-                db_id = ids_map[idx]
-                found_db_ids.append(db_id)
-                scores[db_id] = float(D[0][i])
+        visual_hits, shard_report = visual if visual is not None else ([], None)
 
-        if not found_db_ids: return []
+        if not visual_hits and not lexical_hits:
+            if shard_report is not None and not shard_report["answered"]:
+                return api_error(503, "All index shards failed and the text search found nothing.")
+            if visual is None:
+                return api_error(422, "Could not understand text.")
+        if shard_report is not None:
+            add_shard_headers(response, shard_report)
 
+        # Per-leg latency, visible in browser devtools and in the logs
+        response.headers["Server-Timing"] = f"visual;dur={visual_ms:.1f}, lexical;dur={lexical_ms:.1f}"
+        print(f"   visual: {len(visual_hits)} hits in {visual_ms:.0f}ms | lexical: {len(lexical_hits)} hits in {lexical_ms:.0f}ms")
+
+        # 2. Fuse the two rankings (Reciprocal Rank Fusion)
+        fused = reciprocal_rank_fusion([
+            [pid for pid, _ in visual_hits],
+            [pid for pid, _ in lexical_hits],
+        ])[:10]
+
+        if not fused: return []
+
+        # 3. Fetch Results from DB
         conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        placeholders = ",".join(["%s"] * len(found_db_ids))
-        query = f"SELECT id, title, price, image_url, product_url, vendor FROM products WHERE id IN ({placeholders})"
-        cur.execute(query, tuple(found_db_ids))
-        products = cur.fetchall()
+        products = fetch_products(conn, [pid for pid, _ in fused], "id, title, price, image_url, product_url, vendor")
         conn.close()
 
+        # 'score' stays the CLIP similarity (the UI shows it as "% match"),
+        # the order comes from the fused ranking.
+        visual_scores = dict(visual_hits)
+        fused_scores = dict(fused)
         for p in products:
-            p['score'] = scores.get(p['id'], 0)
+            p['score'] = visual_scores.get(p['id'], 0)
+            p['rrf_score'] = fused_scores.get(p['id'], 0)
 
-        final_results = sorted(products, key=lambda x: x['score'], reverse=True)
+        final_results = sorted(products, key=lambda x: x['rrf_score'], reverse=True)
         return final_results
 
     except Exception as e:
-        return {"error": str(e)}
+        print(f"❌ {e}")
+        return api_error(500, str(e))
 
 class PinterestRequest(BaseModel):
     board_url: str
 
-@app.post("/recommend/pinterest")
-def recommend_from_pinterest(req: PinterestRequest):
-    print(f"📌 Received Pinterest Request: {req.board_url}")
+def _compute_board_vibe(board_url):
+    """The slow part: scrape the board and embed its pins. board_jobs caches this per board."""
+    print(f"📌 Scraping Pinterest board: {board_url}")
 
-    # 1. Scrape Images
-    image_urls = scrape_pinterest_board(req.board_url, max_images=15)
+    # 1. Scrape Images (headless Chrome: launch + page load + scrolling)
+    with stage("browser_scrape"):
+        image_urls = scrape_pinterest_board(board_url, max_images=15)
 
     if not image_urls:
-        return {"error": "Could not access board. Is it public?"}
+        raise BoardJobError("Could not access board. Is it public?")
 
     print(f"   Analysing {len(image_urls)} images for Vibe...")
 
@@ -182,45 +264,118 @@ def recommend_from_pinterest(req: PinterestRequest):
     vibe_vector = get_average_embedding(image_urls)
 
     if vibe_vector is None:
-        return {"error": "Could not analyze images."}
+        raise BoardJobError("Could not analyze images.")
+
+    return {"pins": image_urls, "vibe_vector": vibe_vector}
 
+def _recommend_from_vibe(vibe):
+    """The fast part: search with a board's vibe vector. Re-run even on cache hits, so results follow the index."""
     # 3. Search FAISS
     try:
-        D, I = index.search(np.array([vibe_vector]).astype('float32'), k=20)
+        hits, shard_report = coordinator.search(vibe["vibe_vector"], k=20)
+    except ShardUnavailable as e:
+        raise BoardJobError(str(e), status_code=503)
 
-        # 4. Fetch Results from DB
-        found_db_ids = []
-        scores = {}
-        for i, idx in enumerate(I[0]):
-            if idx in ids_map:
-                db_id = ids_map[idx]
-                found_db_ids.append(db_id)
-                scores[db_id] = float(D[0][i])
+    # 4. Fetch Results from DB
+    scores = dict(hits)
 
-        if not found_db_ids: return []
+    conn = get_db_connection()
+    products = fetch_products(conn, list(scores))
+    conn.close()
 
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        placeholders = ",".join(["%s"] * len(found_db_ids))
-        query = f"SELECT * FROM products WHERE id IN ({placeholders})"
-        cur.execute(query, tuple(found_db_ids))
-        products = cur.fetchall()
-        conn.close()
+    # Attach scores & Sort
+    for p in products:
+        p['score'] = scores.get(p['id'], 0)
 
-        # Attach scores & Sort
-        for p in products:
-            p['score'] = scores.get(p['id'], 0)
+    final_results = sorted(products, key=lambda x: x['score'], reverse=True)
 
-        final_results = sorted(products, key=lambda x: x['score'], reverse=True)
+    return {
+        "message": "Success",
+        "scraped_count": len(vibe["pins"]),
+        "shards": shard_report,
+        "results": final_results
+    }
 
-        return {
-            "message": "Success",
-            "scraped_count": len(image_urls),
-            "results": final_results
-        }
+# Bounded worker pool + per-board cache; repeat/concurrent requests for a board share one job
+board_jobs = BoardJobs(_compute_board_vibe, _recommend_from_vibe)
 
-    except Exception as e:
-        return {"error": str(e)}
+# How long the blocking endpoint waits before handing the client a job to poll instead
+# (it holds one of the shared request threads while it waits, so keep this short)
+PINTEREST_SYNC_TIMEOUT_SECONDS = float(os.environ.get("PINTEREST_SYNC_TIMEOUT_SECONDS", "15"))
+
+def _job_body(job):
+    body = job.to_dict()
+    body["status_url"] = f"/recommend/pinterest/jobs/{job.id}"
+    body["events_url"] = f"/recommend/pinterest/jobs/{job.id}/events"
+    return body
+
+@app.post("/recommend/pinterest")
+def recommend_from_pinterest(req: PinterestRequest):
+    """Blocking version (kept for old clients). New clients should use /recommend/pinterest/jobs."""
+    if coordinator is None: return api_error(503, "AI Index not loaded")
+
+    print(f"📌 Received Pinterest Request: {req.board_url}")
+
+    try:
+        job = board_jobs.submit(req.board_url)
+    except QueueFull as e:
+        return api_error(429, str(e))
+
+    if not job.wait(PINTEREST_SYNC_TIMEOUT_SECONDS):
+        # Still going: return the job instead of holding the connection until the client gives up
+        return JSONResponse(status_code=202, content=jsonable_encoder(_job_body(job)))
+    if job.status == "failed":
+        return api_error(job.error_status, job.error)
+    return job.result
+
+@app.post("/recommend/pinterest/jobs", status_code=202)
+def enqueue_pinterest_job(req: PinterestRequest):
+    """Queues a board and returns a job id straight away (status 'done' already if the board was cached)."""
+    if coordinator is None: return api_error(503, "AI Index not loaded")
+
+    print(f"📌 Queueing Pinterest board: {req.board_url}")
+
+    try:
+        job = board_jobs.submit(req.board_url)
+    except QueueFull as e:
+        return api_error(429, str(e))
+    return _job_body(job)
+
+@app.get("/recommend/pinterest/jobs/{job_id}")
+def get_pinterest_job(job_id: str):
+    """Poll: status is queued | running | done (with 'result') | failed (with 'error')."""
+    job = board_jobs.get(job_id)
+    if job is None: return api_error(404, "Unknown or expired job.")
+    return _job_body(job)
+
+@app.get("/recommend/pinterest/jobs/{job_id}/events")
+def stream_pinterest_job(job_id: str):
+    """Server-Sent Events: one message per status change, the last one has the result or error."""
+    job = board_jobs.get(job_id)
+    if job is None: return api_error(404, "Unknown or expired job.")
+
+    async def events():
+        # async + asyncio.sleep: an open stream costs nothing while it waits,
+        # instead of pinning one of the threads the sync endpoints run on
+        last_status = None
+        idle = 0.0
+        while True:
+            finished = job.finished.is_set()
+            if job.status != last_status or finished:
+                # The first message goes out straight away with the current status
+                last_status = job.status
+                yield f"data: {json.dumps(jsonable_encoder(_job_body(job)))}\n\n"
+                idle = 0.0
+            elif idle >= 15:
+                # SSE comment line, keeps proxies from closing a quiet connection
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            if finished:
+                return
+            await asyncio.sleep(0.5)
+            idle += 0.5
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 # backend/main.py (Add to bottom)
@@ -250,13 +405,15 @@ def get_all_brands():
             ORDER BY item_count DESC;
         """
         
-        cur.execute(query)
-        brands = cur.fetchall()
+        with stage("db_query"):
+            cur.execute(query)
+            brands = cur.fetchall()
         conn.close()
         
         return brands
     except Exception as e:
-        return {"error": str(e)}
+        print(f"❌ {e}")
+        return api_error(500, str(e))
 
 @app.get("/brands/{brand_name}")
 def get_brand_products(brand_name: str):
@@ -269,8 +426,9 @@ def get_brand_products(brand_name: str):
         
         # We use ILIKE for case-insensitive matching (okhai == Okhai)
         query = "SELECT * FROM products WHERE vendor ILIKE %s ORDER BY id DESC"
-        cur.execute(query, (brand_name,))
-        products = cur.fetchall()
+        with stage("db_query"):
+            cur.execute(query, (brand_name,))
+            products = cur.fetchall()
         conn.close()
         
         return {
@@ -279,12 +437,13 @@ def get_brand_products(brand_name: str):
             "products": products
         }
     except Exception as e:
-        return {"error": str(e)}
+        print(f"❌ {e}")
+        return api_error(500, str(e))
 
 
 # backend/main.py
 
 # --- PASTE THIS HELPER FUNCTION ---
 def get_db_connection():
-    return psycopg2.connect("dbname=styledb user=postgres password=postgres")
+    return psycopg2.connect(os.environ.get("DATABASE_URL", "dbname=styledb user=postgres password=postgres"))
 # ----------------------------------
\ No newline at end of file
@@ -0,0 +1,94 @@
+# backend/metrics.py
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+# Requests slower than this print their stage breakdown
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "2"))
+
+# Covers 5ms FAISS lookups up to 30s+ Pinterest scrapes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+REQUEST_SECONDS = Histogram(
+    "stylescout_request_seconds", "End-to-end request latency", ["method", "endpoint"], buckets=BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "stylescout_stage_seconds", "Latency of one stage of a request (scrape, download, embed, search...)", ["stage"], buckets=BUCKETS
+)
+REQUEST_ERRORS = Counter(
+    "stylescout_request_errors_total", "Requests that ended in a 4xx/5xx or an unhandled exception", ["endpoint", "status"]
+)
+CACHE_EVENTS = Counter(
+    "stylescout_cache_total", "Lookups in the in-process caches", ["cache", "result"]  # result = hit | miss | coalesced
+)
+BOARD_JOBS_PENDING = Gauge(
+    "stylescout_board_jobs_pending", "Pinterest board jobs queued or running"
+)
+SHARDS = Gauge(
+    "stylescout_shards", "Index shards the search coordinator fans out to"
+)
+SHARD_SECONDS = Histogram(
+    "stylescout_shard_search_seconds", "Latency of one shard's part of a vector search", ["shard"], buckets=BUCKETS
+)
+SHARD_FAILURES = Counter(
+    "stylescout_shard_failures_total", "Shard searches that errored or missed the deadline", ["shard", "reason"]  # reason = error | timeout
+)
+
+# The spans of the request currently being handled (None outside a request)
+_spans = contextvars.ContextVar("stylescout_spans", default=None)
+
+
+@contextmanager
+def stage(name):
+    """
+    Times a block as one stage of the current request:
+        with stage("faiss_search"):
+            index.search(...)
+    Cheap enough to leave on (a perf_counter pair + one histogram observe).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def start_request():
+    """Starts collecting spans for a new request. Returns the list they land in."""
+    spans = []
+    _spans.set(spans)
+    return spans
+
+
+def finish_request(method, endpoint, status, elapsed, spans):
+    """Records the request metrics and prints the breakdown if it was slow."""
+    REQUEST_SECONDS.labels(method, endpoint).observe(elapsed)
+    if status >= 400:
+        REQUEST_ERRORS.labels(endpoint, str(status)).inc()
+
+    if elapsed >= SLOW_REQUEST_SECONDS:
+        print(f"🐢 Slow request: {method} {endpoint} -> {status} in {elapsed:.2f}s | {format_breakdown(spans)}")
+
+
+def format_breakdown(spans):
+    """[('image_download', 0.4), ('image_download', 0.6)] -> 'image_download 1.00s (2x)'"""
+    totals = {}
+    for name, elapsed in spans:
+        total, count = totals.get(name, (0.0, 0))
+        totals[name] = (total + elapsed, count + 1)
+
+    parts = []
+    for name, (total, count) in totals.items():
+        parts.append(f"{name} {total:.2f}s" + (f" ({count}x)" if count > 1 else ""))
+    return ", ".join(parts) or "no stages recorded"
+
+
+def render_metrics():
+    """Prometheus text format for the /metrics endpoint: (body, content_type)."""
+    return generate_latest(), CONTENT_TYPE_LATEST
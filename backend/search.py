@@ -0,0 +1,98 @@
+# backend/search.py
+import os
+import time
+import numpy as np
+from psycopg2.extras import RealDictCursor
+from backend.metrics import stage
+
+# Standard RRF constant. Higher = flatter blend between the two rankings.
+RRF_K = 60
+
+
+def vector_search(index, ids_map, query_vec, k=10, rerank_vectors=None, rerank_factor=4):
+    """
+    Searches FAISS and maps row positions back to product ids.
+    If rerank_vectors (the mmap'd float32 side file from build_index.py --rerank)
+    is given, pulls k * rerank_factor candidates from the compact index and
+    re-scores them exactly before keeping the top k.
+    Returns [(product_id, score), ...] best first.
+    """
+    query = np.array([query_vec]).astype('float32')
+    depth = k * rerank_factor if rerank_vectors is not None else k
+    with stage("faiss_search"):
+        D, I = index.search(query, k=depth)
+
+    # FAISS pads with -1 when the index holds fewer than k vectors
+    scored = [(idx, score) for idx, score in zip(I[0], D[0]) if 0 <= idx < len(ids_map)]
+
+    if rerank_vectors is not None:
+        # Fancy indexing on a memmap only reads the candidate rows from disk (sorted = sequential reads)
+        with stage("rerank"):
+            rows = sorted(idx for idx, _ in scored)
+            exact = np.asarray(rerank_vectors[rows]) @ query[0]
+            scored = sorted(zip(rows, exact), key=lambda x: x[1], reverse=True)[:k]
+
+    return [(ids_map[idx], float(score)) for idx, score in scored]
+
+
+def load_rerank_vectors(path, index):
+    """Memory-maps the float32 side file, or returns None if it's missing / out of sync."""
+    if not os.path.exists(path):
+        return None
+    vectors = np.load(path, mmap_mode="r")
+    if vectors.shape[0] != index.ntotal:
+        print(f"⚠️ Ignoring {os.path.basename(path)}: {vectors.shape[0]} rows but index has {index.ntotal}")
+        return None
+    return vectors
+
+
+def lexical_search(conn, query, k=50):
+    """
+    Full-text search over title + description + vendor (the 'search_tsv'
+    column added by fix_db.py). Catches exact terms CLIP is fuzzy on,
+    e.g. 'chikankari', 'co-ord' or a brand name.
+    Returns [(product_id, rank), ...] best first.
+    """
+    cur = conn.cursor()
+    with stage("lexical_search"):
+        cur.execute("""
+            SELECT id, ts_rank_cd(search_tsv, q) AS rank
+            FROM products, websearch_to_tsquery('simple', %s) AS q
+            WHERE search_tsv @@ q
+            ORDER BY rank DESC
+            LIMIT %s
+        """, (query, k))
+        rows = cur.fetchall()
+    return [(pid, float(rank)) for pid, rank in rows]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Merges several ranked id lists into one.
+    Each list contributes 1 / (k + rank), so only positions matter,
+    not the (incomparable) raw scores of each retriever.
+    Returns [(product_id, fused_score), ...] best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, pid in enumerate(ranking):
+            fused[pid] = fused.get(pid, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+def fetch_products(conn, product_ids, columns="*"):
+    """Loads product rows for the given ids as dicts (order not preserved)."""
+    if not product_ids:
+        return []
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    placeholders = ",".join(["%s"] * len(product_ids))
+    with stage("db_hydrate"):
+        cur.execute(f"SELECT {columns} FROM products WHERE id IN ({placeholders})", tuple(product_ids))
+        return cur.fetchall()
+
+
+def timed(fn, *args):
+    """Runs fn(*args) and returns (result, elapsed_ms)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
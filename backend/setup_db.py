@@ -1,9 +1,10 @@
 # backend/setup_db.py
+import os
 import psycopg2
 
 # Connect to your database
-# CHANGE 'user' and 'password' to your local postgres credentials!
-conn = psycopg2.connect("dbname=styledb user=postgres password=")
+# CHANGE 'user' and 'password' to your local postgres credentials! (or set DATABASE_URL)
+conn = psycopg2.connect(os.environ.get("DATABASE_URL", "dbname=styledb user=postgres password="))
 cur = conn.cursor()
 
 # Create Products Table
@@ -0,0 +1,47 @@
+# backend/shard_worker.py
+# Serves ONE shard of a sharded index (python ml/build_index.py --shards N) over HTTP.
+# No CLIP / torch here: the API embeds the query and sends the vector.
+#
+#   SHARD=0 uvicorn backend.shard_worker:app --port 9000
+#   SHARD=1 uvicorn backend.shard_worker:app --port 9001
+#   STYLE_SHARDS=http://127.0.0.1:9000,http://127.0.0.1:9001 uvicorn backend.main:app
+import os
+import sys
+import numpy as np
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.shards import load_manifest_shards
+from backend.metrics import render_metrics
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_DIR = os.environ.get("STYLE_INDEX_DIR", BASE_DIR)
+SHARD_NO = int(os.environ.get("SHARD", "0"))
+
+print(f"⏳ Loading shard {SHARD_NO}...")
+shards = load_manifest_shards(INDEX_DIR, only=SHARD_NO)
+if not shards:
+    raise SystemExit(f"❌ Shard {SHARD_NO} is not listed in {INDEX_DIR}/shards.json")
+shard = shards[0]
+print(f"✅ Shard {SHARD_NO} ready ({shard.index.ntotal} vectors).")
+
+app = FastAPI()
+
+class ShardSearchRequest(BaseModel):
+    vector: list[float]
+    k: int = 10
+
+@app.post("/search")
+def search(req: ShardSearchRequest):
+    hits = shard.search(np.array(req.vector, dtype='float32'), req.k)
+    return {"shard": shard.name, "hits": hits}
+
+@app.get("/health")
+def health():
+    return shard.describe()
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
@@ -0,0 +1,183 @@
+# backend/shards.py
+import os
+import json
+import time
+import heapq
+import pickle
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+import faiss
+import requests
+from backend.search import vector_search, load_rerank_vectors
+from backend.metrics import stage, SHARDS, SHARD_SECONDS, SHARD_FAILURES
+
+# Written by 'python ml/build_index.py --shards N'
+SHARD_MANIFEST = "shards.json"
+
+# A shard that hasn't answered by then is dropped from the merge, not waited for
+SHARD_TIMEOUT_SECONDS = float(os.environ.get("SHARD_TIMEOUT_SECONDS", "2"))
+
+
+class ShardUnavailable(Exception):
+    """Raised when no shard at all could answer a search. Carries the shard report (answered = 0)."""
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report
+
+
+class LocalShard:
+    """An index loaded into this process. FAISS releases the GIL, so local shards search in parallel."""
+
+    def __init__(self, name, index_path, ids_path, rerank_path=None):
+        self.name = name
+        self.index = faiss.read_index(index_path)
+        with open(ids_path, "rb") as f:
+            self.ids = pickle.load(f)
+        self.rerank_vectors = load_rerank_vectors(rerank_path, self.index) if rerank_path else None
+
+    def describe(self):
+        return {"name": self.name, "size": self.index.ntotal, "rerank": self.rerank_vectors is not None}
+
+    def search(self, query_vec, k):
+        return vector_search(self.index, self.ids, query_vec, k=k, rerank_vectors=self.rerank_vectors)
+
+
+class HttpShard:
+    """A shard served by backend/shard_worker.py in another process or on another node."""
+
+    def __init__(self, url):
+        self.name = url
+        self.url = url.rstrip("/")
+        self._local = threading.local()
+
+    def _session(self):
+        # One keep-alive session per thread (requests.Session isn't thread-safe)
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def describe(self):
+        return {"name": self.name, "remote": True}
+
+    def search(self, query_vec, k):
+        r = self._session().post(
+            f"{self.url}/search",
+            json={"vector": [float(x) for x in query_vec], "k": k},
+            timeout=SHARD_TIMEOUT_SECONDS,
+        )
+        r.raise_for_status()
+        return [(pid, score) for pid, score in r.json()["hits"]]
+
+
+class ShardCoordinator:
+    """
+    Scatter-gather over every shard: each one returns its own top-k, and
+    the global top-k is the best k of those (all scores are inner products
+    of normalized vectors, so they compare across shards).
+    A failed or slow shard only removes its products from the results.
+    """
+
+    def __init__(self, shards):
+        self.shards = shards
+        # Enough threads for several concurrent requests to fan out at once
+        self.pool = ThreadPoolExecutor(max_workers=max(4, len(shards) * 8))
+        SHARDS.set(len(shards))
+
+    def describe(self):
+        return [shard.describe() for shard in self.shards]
+
+    def _search_one(self, shard, query_vec, k):
+        start = time.perf_counter()
+        try:
+            hits = shard.search(query_vec, k)
+        finally:
+            elapsed = time.perf_counter() - start
+            SHARD_SECONDS.labels(shard.name).observe(elapsed)
+        return hits, elapsed
+
+    def search(self, query_vec, k):
+        """
+        Returns (hits, report): hits = [(product_id, score), ...] best first,
+        report = shard counts, per-shard latency and any failures, for the response.
+        """
+        futures = {
+            # copy_context so stage() timings inside local shards still land on this request
+            self.pool.submit(contextvars.copy_context().run, self._search_one, shard, query_vec, k): shard
+            for shard in self.shards
+        }
+        with stage("shard_gather"):
+            _, not_done = wait(futures, timeout=SHARD_TIMEOUT_SECONDS)
+
+        results, latency_ms, failed = [], {}, {}
+        for future, shard in futures.items():
+            if future in not_done:
+                future.cancel()
+                failed[shard.name] = "timeout"
+                SHARD_FAILURES.labels(shard.name, "timeout").inc()
+                continue
+            try:
+                hits, elapsed = future.result()
+            except Exception as e:
+                print(f"⚠️ Shard {shard.name} failed: {e}")
+                failed[shard.name] = "error"
+                SHARD_FAILURES.labels(shard.name, "error").inc()
+                continue
+            results.extend(hits)
+            latency_ms[shard.name] = round(elapsed * 1000, 1)
+
+        report = {
+            "total": len(self.shards),
+            "answered": len(self.shards) - len(failed),
+            "partial": bool(failed),
+            "failed": failed,
+            "latency_ms": latency_ms,
+        }
+        if not report["answered"]:
+            raise ShardUnavailable(f"All {len(self.shards)} index shards failed", report)
+
+        return heapq.nlargest(k, results, key=lambda hit: hit[1]), report
+
+
+def load_coordinator(index_dir):
+    """
+    Picks the index layout, in order:
+      1. STYLE_SHARDS=http://a:9000,http://b:9001  -> remote shard workers
+      2. <index_dir>/shards.json                    -> local shards from build_index.py --shards N
+      3. <index_dir>/style.index                    -> the classic single index (one local shard)
+    Returns None if there is nothing to serve.
+    """
+    urls = [u.strip() for u in os.environ.get("STYLE_SHARDS", "").split(",") if u.strip()]
+    if urls:
+        return ShardCoordinator([HttpShard(url) for url in urls])
+
+    manifest_path = os.path.join(index_dir, SHARD_MANIFEST)
+    if os.path.exists(manifest_path):
+        return ShardCoordinator(load_manifest_shards(index_dir))
+
+    index_path = os.path.join(index_dir, "style.index")
+    if os.path.exists(index_path):
+        return ShardCoordinator([LocalShard(
+            "main", index_path, os.path.join(index_dir, "ids.pkl"), os.path.join(index_dir, "vectors.f32.npy")
+        )])
+
+    return None
+
+
+def load_manifest_shards(index_dir, only=None):
+    """LocalShards for every entry in shards.json (or just shard number 'only')."""
+    with open(os.path.join(index_dir, SHARD_MANIFEST)) as f:
+        manifest = json.load(f)
+
+    shards = []
+    for entry in manifest["shards"]:
+        if only is not None and entry["shard"] != only:
+            continue
+        shards.append(LocalShard(
+            f"shard{entry['shard']}",
+            os.path.join(index_dir, entry["index"]),
+            os.path.join(index_dir, entry["ids"]),
+            os.path.join(index_dir, entry["rerank"]),
+        ))
+    return shards
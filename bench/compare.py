@@ -0,0 +1,67 @@
+# bench/compare.py
+# Diffs two bench/run.py result files, e.g. the previous commit vs this one:
+#   python -m bench.compare bench/results/a7f46e3.json bench/results/6a57ea6.json
+# Exits 1 if anything got worse by more than --threshold, so it can gate CI.
+import sys
+import json
+import argparse
+
+# (section, metric, True if bigger is better)
+TRACKED = [
+    ("brand_scraper", "products_per_s", True),
+    ("build_index", "items_per_s", True),
+    ("build_index", "index_bytes", False),
+]
+for endpoint in ("search_image", "search_text", "brands"):
+    TRACKED += [
+        (f"api.{endpoint}", "p50_ms", False),
+        (f"api.{endpoint}", "p99_ms", False),
+        (f"api.{endpoint}", "throughput_rps", True),
+        (f"api.{endpoint}", "errors", False),
+    ]
+
+
+def lookup(report, section):
+    for key in section.split("."):
+        report = report.get(key, {})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+
+    if old.get("params") != new.get("params"):
+        print("⚠️ Runs used different parameters; the comparison may not be meaningful.")
+
+    print(f"{'metric':<34}{old.get('commit', 'old'):>12}{new.get('commit', 'new'):>12}{'change':>10}")
+    regressions = []
+    for section, metric, higher_is_better in TRACKED:
+        before, after = lookup(old, section).get(metric), lookup(new, section).get(metric)
+        if before is None or after is None:
+            continue
+
+        change = (after - before) / before if before else (0.0 if after == before else float("inf"))
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  ❌"
+            regressions.append(f"{section}.{metric}")
+        print(f"{section + '.' + metric:<34}{before:>12}{after:>12}{change:>+10.1%}{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
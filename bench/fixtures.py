@@ -0,0 +1,178 @@
+# bench/fixtures.py
+# Local stand-ins for everything the app normally fetches from the internet:
+#   - a synthetic catalog spread over fake Shopify stores
+#   - an HTTP server serving their products.json pages and product images
+#   - a tiny randomly-initialised CLIP model (same code path, no download)
+import io
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from PIL import Image, ImageDraw
+
+# Fake hostnames. Requests reach the fixture server through HTTP_PROXY, so the
+# scraper still sees a real-looking store domain (and derives the vendor from it).
+IMAGE_HOST = "img.bench.test"
+STORE_HOST = "{name}.bench.test"
+
+# brand_scraper only reads the first products.json page (limit=250)
+SHOPIFY_PAGE_SIZE = 250
+
+COLORS = ["ivory", "indigo", "mustard", "rust", "sage", "blush", "black", "teal", "maroon", "olive"]
+FABRICS = ["cotton", "linen", "mulmul", "silk", "chanderi", "khadi", "georgette", "denim"]
+CRAFTS = ["chikankari", "block print", "bandhani", "ikat", "kantha", "hand embroidered", "tie-dye", "ajrakh"]
+GARMENTS = ["kurta", "co-ord set", "maxi dress", "shirt", "palazzo", "saree", "jumpsuit", "wrap skirt", "anarkali"]
+BRANDS = ["okhai", "mulmul", "jaypore", "nicobar", "itokri", "fabindia", "chidiyaa", "suta", "biba", "rangsutra",
+          "paiwand", "kharakapas", "ekatvam", "tjori", "ochre", "bunaai"]
+SIZES = ["XS", "S", "M", "L", "XL", "Free Size"]
+
+
+class SyntheticCatalog:
+    """Deterministic fake products, grouped into stores of at most one products.json page each."""
+
+    def __init__(self, num_products, num_stores, seed=0):
+        rng = random.Random(seed)
+        num_stores = max(num_stores, -(-num_products // SHOPIFY_PAGE_SIZE))
+
+        self.stores = {}  # host -> list of Shopify-style product dicts
+        for n in range(num_stores):
+            brand = BRANDS[n % len(BRANDS)] + (str(n // len(BRANDS)) if n >= len(BRANDS) else "")
+            self.stores[STORE_HOST.format(name=brand)] = []
+
+        hosts = list(self.stores)
+        for pid in range(num_products):
+            color, fabric = rng.choice(COLORS), rng.choice(FABRICS)
+            craft, garment = rng.choice(CRAFTS), rng.choice(GARMENTS)
+            title = f"{color.title()} {fabric.title()} {craft.title()} {garment.title()}"
+            self.stores[hosts[pid % len(hosts)]].append({
+                "id": pid,
+                "title": title,
+                "handle": f"item-{pid}",
+                "body_html": f"<div><p>A {color} {garment} in breathable <b>{fabric}</b>.</p>"
+                             f"<ul><li>{craft} detailing</li><li>Made by hand</li></ul></div>",
+                "images": [{"src": f"http://{IMAGE_HOST}/{pid}.jpg"}],
+                "variants": [{"title": s, "price": f"{rng.randint(8, 60) * 100}.00"}
+                             for s in rng.sample(SIZES, rng.randint(1, 4))],
+            })
+
+    @property
+    def store_urls(self):
+        return [f"http://{host}" for host in self.stores]
+
+    @property
+    def image_urls(self):
+        return [p["images"][0]["src"] for products in self.stores.values() for p in products]
+
+    def text_queries(self, rng):
+        """Mix of visual-sounding and exact-term queries, like the quiz + search box send."""
+        return [
+            f"{rng.choice(COLORS)} {rng.choice(GARMENTS)}",
+            f"{rng.choice(CRAFTS)} {rng.choice(FABRICS)}",
+            rng.choice(BRANDS),
+            f"{rng.choice(COLORS)} {rng.choice(FABRICS)} {rng.choice(CRAFTS)} {rng.choice(GARMENTS)}",
+        ]
+
+
+def render_image(pid, size):
+    """A deterministic JPEG per product: flat colour plus a few shapes, so decode isn't trivial."""
+    rng = random.Random(pid)
+    image = Image.new("RGB", (size, size), tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(8):
+        x0, y0 = rng.randint(0, size - 1), rng.randint(0, size - 1)
+        x1, y1 = rng.randint(x0, size), rng.randint(y0, size)
+        draw.rectangle([x0, y0, x1, y1], fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    catalog = None
+    image_size = 512
+    _images = {}
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        # Proxied requests carry the absolute URL ('http://okhai.bench.test/products.json?...')
+        url = urlsplit(self.path)
+        host = (url.hostname or self.headers.get("Host", "")).split(":")[0]
+
+        if host == IMAGE_HOST and url.path.endswith(".jpg"):
+            try:
+                pid = int(url.path.rsplit("/", 1)[-1][:-len(".jpg")])
+            except ValueError:
+                return self._send(404, b"not found", "text/plain")
+            with self._lock:
+                if pid not in self._images:
+                    self._images[pid] = render_image(pid, self.image_size)
+            return self._send(200, self._images[pid], "image/jpeg")
+
+        if host in self.catalog.stores and url.path == "/products.json":
+            body = json.dumps({"products": self.catalog.stores[host][:SHOPIFY_PAGE_SIZE]}).encode()
+            return self._send(200, body, "application/json")
+
+        self._send(404, b"not found", "text/plain")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # Thousands of image hits would drown the benchmark output
+
+
+def start_fixture_server(catalog, image_size=512):
+    """Serves the catalog on 127.0.0.1 in a background thread. Returns (server, proxy_url)."""
+    handler = type("BoundFixtureHandler", (FixtureHandler,), {
+        "catalog": catalog, "image_size": image_size, "_images": {}, "_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def build_tiny_clip(path):
+    """
+    Saves a tiny, randomly-initialised CLIP (512-d projection like ViT-B/32) to 'path'
+    so ml/vibe.py runs its real download -> decode -> forward path fully offline.
+    Embeddings are meaningless; only timings are.
+    """
+    import torch
+    from transformers import CLIPConfig, CLIPModel, CLIPProcessor, CLIPTokenizer, CLIPImageProcessor
+    from transformers.models.clip.tokenization_clip import bytes_to_unicode
+
+    path.mkdir(parents=True, exist_ok=True)
+
+    # Byte-level vocab with no merges: every word is tokenised character by character
+    chars = list(bytes_to_unicode().values())
+    vocab = chars + [c + "</w>" for c in chars] + ["<|startoftext|>", "<|endoftext|>"]
+    (path / "vocab.json").write_text(json.dumps({tok: i for i, tok in enumerate(vocab)}))
+    (path / "merges.txt").write_text("#version: 0.2\n")
+    tokenizer = CLIPTokenizer(str(path / "vocab.json"), str(path / "merges.txt"), model_max_length=77)
+
+    image_processor = CLIPImageProcessor(size={"shortest_edge": 32}, crop_size={"height": 32, "width": 32})
+    CLIPProcessor(image_processor=image_processor, tokenizer=tokenizer).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = CLIPConfig(
+        text_config={
+            "vocab_size": len(vocab), "hidden_size": 32, "intermediate_size": 64,
+            "num_hidden_layers": 1, "num_attention_heads": 2, "max_position_embeddings": 77,
+            "bos_token_id": tokenizer.bos_token_id, "eos_token_id": tokenizer.eos_token_id,
+            "pad_token_id": tokenizer.pad_token_id,
+        },
+        vision_config={
+            "hidden_size": 32, "intermediate_size": 64, "num_hidden_layers": 1,
+            "num_attention_heads": 2, "image_size": 32, "patch_size": 8,
+        },
+        projection_dim=512,
+    )
+    CLIPModel(config).save_pretrained(path)
+    return path
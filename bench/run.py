@@ -0,0 +1,302 @@
+# bench/run.py
+# End-to-end offline benchmark. Needs a local Postgres with a SCRATCH database (it gets wiped):
+#   createdb styledb_bench
+#   python -m bench.run --products 2000 --concurrency 8 --requests 200
+# Nothing touches the internet: stores, images and the CLIP model are local stand-ins (bench/fixtures.py).
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import statistics
+import subprocess
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import requests
+
+from bench.fixtures import SyntheticCatalog, start_fixture_server, build_tiny_clip
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+# The benchmark TRUNCATEs products, so it only runs against databases whose name says "bench"
+PRODUCTION_DATABASE = "styledb"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline build / crawl / API latency benchmark.")
+    parser.add_argument("--dsn", default="dbname=styledb_bench user=postgres password=postgres",
+                        help="scratch Postgres database; its products table is wiped")
+    parser.add_argument("--products", type=int, default=2000, help="synthetic catalog size")
+    parser.add_argument("--stores", type=int, default=8, help="fake Shopify stores (raised to fit 250 products each)")
+    parser.add_argument("--image-size", type=int, default=512, help="side of the served product JPEGs, in px")
+    parser.add_argument("--clip-model", help="local CLIP model dir/name instead of the tiny random one")
+    parser.add_argument("--storage", default="float32", help="passed to build_index.py --storage")
+    parser.add_argument("--shards", type=int, default=1, help="passed to build_index.py --shards")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel clients per endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--port", type=int, default=8765, help="port for the API under test")
+    parser.add_argument("--out", help="results JSON (default: bench/results/<commit>.json)")
+    return parser.parse_args()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def latency_stats(latencies, errors, wall):
+    """Summary of one load phase. Latencies in seconds in, milliseconds out."""
+    ms = sorted(x * 1000 for x in latencies)
+
+    def pct(p):
+        return round(ms[min(len(ms) - 1, int(p / 100 * len(ms)))], 2) if ms else None
+
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else None,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": round(ms[-1], 2) if ms else None,
+    }
+
+
+# --- 1. DATABASE ---
+def check_scratch_database(dsn):
+    """
+    Asks the server which database the DSN really points at (any DSN spelling:
+    URI, reordered keys, host=...), and refuses anything that isn't a bench database.
+    """
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT current_database();")
+        name = cur.fetchone()[0]
+    conn.close()
+
+    if name == PRODUCTION_DATABASE or "bench" not in name:
+        sys.exit(f"❌ Refusing to wipe database '{name}'. Point --dsn at a scratch database "
+                 f"with 'bench' in its name (e.g. createdb styledb_bench).")
+    return name
+
+
+def reset_database(env):
+    """Creates/patches the schema with the real scripts, then empties the products table."""
+    # Before setup_db.py / fix_db.py touch anything
+    check_scratch_database(env["DATABASE_URL"])
+    for script in ("backend/setup_db.py", "backend/fix_db.py"):
+        subprocess.run([sys.executable, script], cwd=REPO_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    conn = psycopg2.connect(env["DATABASE_URL"])
+    with conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE products RESTART IDENTITY;")
+    conn.close()
+
+
+# --- 2. CRAWL + INGEST (scraper/brand_scraper.py) ---
+def bench_brand_scraper(catalog):
+    sys.path.insert(0, str(REPO_DIR / "scraper"))  # brand_scraper does 'from cleaner import ...'
+    import brand_scraper
+
+    start = time.perf_counter()
+    per_store = []
+    for url in catalog.store_urls:
+        store_start = time.perf_counter()
+        brand_scraper.scrape_store(url)
+        per_store.append(time.perf_counter() - store_start)
+    wall = time.perf_counter() - start
+
+    conn = psycopg2.connect(os.environ["DATABASE_URL"])
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM products;")
+        ingested = cur.fetchone()[0]
+    conn.close()
+
+    return {
+        "stores": len(per_store),
+        "products_ingested": ingested,
+        "wall_s": round(wall, 3),
+        "products_per_s": round(ingested / wall, 1) if wall else None,
+        "mean_store_s": round(statistics.fmean(per_store), 3) if per_store else None,
+    }
+
+
+# --- 3. INDEX BUILD (ml/build_index.py) ---
+def bench_build_index(workdir, storage, shards, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(REPO_DIR / "ml" / "build_index.py"), "--storage", storage, "--shards", str(shards)],
+        cwd=workdir, env=env, check=True, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+
+    # build_index.py prints its own embedding rate, which excludes torch/model start-up
+    match = re.search(r"Embedded (\d+) items in ([\d.]+)s", result.stdout)
+    embedded, embed_s = (int(match.group(1)), float(match.group(2))) if match else (None, None)
+    return {
+        "storage": storage,
+        "shards": shards,
+        "items_embedded": embedded,
+        "embed_s": embed_s,
+        "items_per_s": round(embedded / embed_s, 1) if embedded and embed_s else None,
+        "wall_s_incl_startup": round(wall, 3),
+        "index_bytes": sum(f.stat().st_size for f in workdir.glob("style*.index")),
+    }
+
+
+# --- 4. API UNDER LOAD ---
+def start_api(port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 180  # torch + model + index load
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited with code {proc.returncode}")
+        try:
+            if requests.get(f"{base}/metrics", timeout=1).ok:
+                return proc, base
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("API did not become ready")
+
+
+def load_test(make_request, total, concurrency):
+    """Fires 'total' requests from 'concurrency' threads, each with its own HTTP session."""
+    local = threading.local()
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = make_request(local.session, i).ok
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latency_stats(latencies, errors, time.perf_counter() - start)
+
+
+def stage_breakdown(base):
+    """Mean per-stage time from the API's own /metrics histograms."""
+    text = requests.get(f"{base}/metrics", timeout=5).text
+    sums = dict(re.findall(r'stylescout_stage_seconds_sum\{stage="([^"]+)"\} ([\d.e+-]+)', text))
+    counts = dict(re.findall(r'stylescout_stage_seconds_count\{stage="([^"]+)"\} ([\d.e+-]+)', text))
+    return {
+        name: {"count": int(float(counts[name])), "mean_ms": round(float(sums[name]) / float(counts[name]) * 1000, 3)}
+        for name in sums if float(counts.get(name, 0))
+    }
+
+
+def bench_api(base, catalog, args):
+    rng = random.Random(1)
+    images = catalog.image_urls
+    queries = [q for _ in range(50) for q in catalog.text_queries(rng)]
+
+    scenarios = {
+        "search_image": lambda s, i: s.post(f"{base}/search", json={"image_url": images[i % len(images)]}, timeout=60),
+        "search_text": lambda s, i: s.post(f"{base}/search/text", json={"query": queries[i % len(queries)]}, timeout=60),
+        "brands": lambda s, i: s.get(f"{base}/brands", timeout=60),
+    }
+
+    results = {}
+    for name, make_request in scenarios.items():
+        load_test(make_request, min(10, args.requests), args.concurrency)  # warm-up, not recorded
+        results[name] = load_test(make_request, args.requests, args.concurrency)
+        print(f"   {name:<13} p50 {results[name]['p50_ms']}ms  p99 {results[name]['p99_ms']}ms  "
+              f"{results[name]['throughput_rps']} req/s  ({results[name]['errors']} errors)")
+    return results
+
+
+def main():
+    args = parse_args()
+    database = check_scratch_database(args.dsn)
+    print(f"🗄️  Using scratch database '{database}'")
+
+    catalog = SyntheticCatalog(args.products, args.stores)
+    server, proxy_url = start_fixture_server(catalog, args.image_size)
+    print(f"🧪 Fixture server on {proxy_url}: {args.products} products in {len(catalog.stores)} stores")
+
+    # Everything (this process, build_index, the API) reaches the fake stores/images via the
+    # fixture server, and goes direct to the API and Postgres on localhost.
+    os.environ.update({
+        "DATABASE_URL": args.dsn,
+        "HTTP_PROXY": proxy_url, "http_proxy": proxy_url,
+        "NO_PROXY": "127.0.0.1,localhost", "no_proxy": "127.0.0.1,localhost",
+    })
+
+    with tempfile.TemporaryDirectory(prefix="stylescout-bench-") as tmp:
+        workdir = Path(tmp)
+        clip_model = args.clip_model or str(build_tiny_clip(workdir / "tiny-clip"))
+        env = {**os.environ, "CLIP_MODEL": clip_model, "STYLE_INDEX_DIR": str(workdir),
+               "PYTHONPATH": str(REPO_DIR), "SLOW_REQUEST_SECONDS": "3600"}
+
+        print("🗄️  Resetting benchmark database...")
+        reset_database(env)
+
+        print("🛍️  brand_scraper crawl + ingest...")
+        scraper_results = bench_brand_scraper(catalog)
+
+        print("🧠 build_index.py...")
+        build_results = bench_build_index(workdir, args.storage, args.shards, env)
+
+        print(f"🚀 API load test ({args.concurrency} clients x {args.requests} requests per endpoint)...")
+        api, base = start_api(args.port, env)
+        try:
+            api_results = bench_api(base, catalog, args)
+            stages = stage_breakdown(base)
+        finally:
+            api.terminate()
+            api.wait()
+
+    server.shutdown()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {
+            "products": args.products, "stores": len(catalog.stores), "image_size": args.image_size,
+            "clip_model": args.clip_model or "tiny-random", "storage": args.storage, "shards": args.shards,
+            "concurrency": args.concurrency, "requests": args.requests,
+        },
+        "brand_scraper": scraper_results,
+        "build_index": build_results,
+        "api": api_results,
+        "api_stages": stages,
+    }
+
+    out = Path(args.out) if args.out else REPO_DIR / "bench" / "results" / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"✅ Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,166 @@
 # ml/build_index.py
-from vibe import get_average_embedding 
+from vibe import get_average_embedding
 
+import os
+import json
+import time
+import zlib
+import argparse
 import psycopg2
 import faiss
 import pickle
+import torch
 import numpy as np # Re-use your embedding logic
+from multiprocessing import Pool
 
-# 1. Fetch Data
-conn = psycopg2.connect("dbname=styledb user=postgres password=postgres")
-cur = conn.cursor()
-cur.execute("SELECT id, image_url FROM products")
-rows = cur.fetchall()
-
-ids = []
-vectors = []
-
-print(f"Processing {len(rows)} items...")
-
-for row in rows:
-    pid, url = row
-    # We cheat and reuse the 'get_average' function for single images
-    # In reality, you'd make a 'get_single_embedding' function
-    vec = get_average_embedding([url]) 
-    
-    if vec is not None:
-        vectors.append(vec)
-        ids.append(pid)
-
-# 2. Build FAISS Index
-dimension = 512
-index = faiss.IndexFlatIP(dimension)
-vector_matrix = np.array(vectors).astype('float32')
-index.add(vector_matrix)
-
-# 3. Save to Disk
-faiss.write_index(index, "style.index")
-with open("ids.pkl", "wb") as f:
-    pickle.dump(ids, f)
-
-print("✅ Index built and saved as 'style.index'")
\ No newline at end of file
+# Storage modes:
+#   float32 -> exact, 2KB per product (512 dims x 4 bytes)
+#   float16 -> half the memory, practically no recall loss
+#   int8    -> a quarter of the memory, small recall loss (use --rerank to win it back)
+STORAGE_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+RERANK_FILE = "vectors.f32.npy"
+DIMENSION = 512
+
+# Sharded mode (--shards N > 1) writes one set of files per shard plus a manifest
+# that the API (backend/shards.py) and shard workers (backend/shard_worker.py) read.
+SHARD_MANIFEST = "shards.json"
+SHARD_FILES = {
+    "index": "style.shard{n}.index",
+    "ids": "ids.shard{n}.pkl",
+    "rerank": "vectors.shard{n}.f32.npy",
+}
+
+
+def embed_rows(rows):
+    """[(id, image_url), ...] -> (ids, float32 matrix) for the images that could be embedded."""
+    ids = []
+    vectors = []
+
+    for pid, url in rows:
+        # We cheat and reuse the 'get_average' function for single images
+        # In reality, you'd make a 'get_single_embedding' function
+        vec = get_average_embedding([url])
+
+        if vec is not None:
+            vectors.append(vec)
+            ids.append(pid)
+
+    return ids, np.array(vectors, dtype='float32').reshape(-1, DIMENSION)
+
+
+def build_faiss(vector_matrix, storage):
+    # An empty shard can't train a quantizer; a flat index is fine for zero vectors
+    if storage == "float32" or len(vector_matrix) == 0:
+        index = faiss.IndexFlatIP(DIMENSION)
+    else:
+        index = faiss.IndexScalarQuantizer(DIMENSION, STORAGE_TYPES[storage], faiss.METRIC_INNER_PRODUCT)
+        # int8 learns a per-dimension min/max range; fp16 training is a no-op
+        index.train(vector_matrix)
+    index.add(vector_matrix)
+    return index
+
+
+def save_index(index, ids, vector_matrix, files, rerank):
+    faiss.write_index(index, files["index"])
+    with open(files["ids"], "wb") as f:
+        pickle.dump(ids, f)
+
+    # Row i of the side file == FAISS row i, so the API can mmap it and only touch the rows it re-ranks
+    if rerank:
+        np.save(files["rerank"], vector_matrix)
+    elif os.path.exists(files["rerank"]):
+        # A stale side file would no longer line up with the new index
+        os.remove(files["rerank"])
+
+
+def shard_of(row, num_shards, shard_by):
+    """Stable across processes and runs (unlike Python's hash())."""
+    pid, _, vendor = row
+    key = str(pid) if shard_by == "id" else (vendor or "").lower()
+    return zlib.crc32(key.encode()) % num_shards
+
+
+def build_shard(job):
+    """Runs in a worker process: embed one shard's rows and write its files."""
+    n, rows, storage, rerank, threads = job
+    torch.set_num_threads(threads)  # N shards x all cores each would just thrash
+
+    start = time.perf_counter()
+    ids, vector_matrix = embed_rows(rows)
+    elapsed = time.perf_counter() - start
+
+    files = {kind: name.format(n=n) for kind, name in SHARD_FILES.items()}
+    save_index(build_faiss(vector_matrix, storage), ids, vector_matrix, files, rerank)
+    print(f"   🧩 Shard {n}: {len(ids)} vectors in {elapsed:.2f}s")
+    return {"shard": n, "count": len(ids), "seconds": round(elapsed, 3), **files}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed every product image and save the FAISS index.")
+    parser.add_argument("--storage", choices=["float32", *STORAGE_TYPES], default="float32")
+    parser.add_argument("--rerank", action="store_true",
+                        help=f"also save exact float32 vectors to {RERANK_FILE} so the API can re-rank compact results")
+    parser.add_argument("--shards", type=int, default=1, help="split the catalog into N indexes built in parallel")
+    parser.add_argument("--shard-by", choices=["id", "vendor"], default="id",
+                        help="'vendor' keeps each brand on one shard; 'id' balances sizes")
+    parser.add_argument("--workers", type=int, default=None, help="build processes (default: min(shards, CPUs))")
+    args = parser.parse_args()
+    rerank = args.rerank and args.storage != "float32"
+
+    # 1. Fetch Data
+    conn = psycopg2.connect(os.environ.get("DATABASE_URL", "dbname=styledb user=postgres password=postgres"))
+    cur = conn.cursor()
+    cur.execute("SELECT id, image_url, vendor FROM products")
+    rows = cur.fetchall()
+    conn.close()
+
+    print(f"Processing {len(rows)} items...")
+    start = time.perf_counter()
+
+    if args.shards <= 1:
+        # 2. Build FAISS Index
+        ids, vector_matrix = embed_rows([(pid, url) for pid, url, _ in rows])
+        elapsed = time.perf_counter() - start
+        print(f"⏱️  Embedded {len(ids)} items in {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-9):.1f} items/s)")
+
+        # 3. Save to Disk
+        index = build_faiss(vector_matrix, args.storage)
+        save_index(index, ids, vector_matrix, {"index": "style.index", "ids": "ids.pkl", "rerank": RERANK_FILE}, rerank)
+        if rerank:
+            print(f"💾 Saved float32 re-rank vectors to '{RERANK_FILE}'")
+        if os.path.exists(SHARD_MANIFEST):
+            # Otherwise the API would keep serving the old shards
+            os.remove(SHARD_MANIFEST)
+
+        print(f"✅ Index built and saved as 'style.index' ({args.storage}, {index.ntotal} vectors)")
+        return
+
+    # 2. Partition + build every shard in its own process
+    partitions = [[] for _ in range(args.shards)]
+    for row in rows:
+        partitions[shard_of(row, args.shards, args.shard_by)].append(row[:2])
+
+    workers = args.workers or min(args.shards, os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧩 Building {args.shards} shards (by {args.shard_by}) with {workers} processes...")
+
+    jobs = [(n, part, args.storage, rerank, threads) for n, part in enumerate(partitions)]
+    with Pool(processes=workers) as pool:
+        shards = pool.map(build_shard, jobs)
+
+    total = sum(s["count"] for s in shards)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  Embedded {total} items in {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-9):.1f} items/s)")
+
+    # 3. Manifest last, so the API never sees a half-written set of shards
+    with open(SHARD_MANIFEST, "w") as f:
+        json.dump({"storage": args.storage, "shard_by": args.shard_by, "rerank": rerank, "shards": shards}, f, indent=2)
+
+    print(f"✅ {args.shards} shards built and listed in '{SHARD_MANIFEST}' ({args.storage}, {total} vectors)")
+
+
+if __name__ == "__main__":
+    main()
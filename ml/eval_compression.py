@@ -0,0 +1,154 @@
+# ml/eval_compression.py
+# Measures how much memory the compact index modes save vs how much recall@k they lose,
+# on OUR catalog vectors (not a toy dataset). Run after build_index.py:
+#   python ml/build_index.py              (float32)  or
+#   python ml/build_index.py --storage int8 --rerank
+#   python ml/eval_compression.py --queries 500
+#
+# Recall is reported separately for image queries (/search, /recommend/pinterest) and
+# text queries (/search/text). Text-to-image similarities are small (~0.2-0.3) and
+# bunched together, so quantization error hurts text queries much more.
+import os
+import json
+import time
+import argparse
+import faiss
+import numpy as np
+
+# What /search/text actually receives: search-box style queries plus the quiz phrases
+# built by generateQueryFromQuiz in the frontend (style-scout-aesthetics/src/lib/api.ts)
+TEXT_QUERIES = [
+    "red floral dress", "white chikankari kurta", "black co-ord set", "indigo block print saree",
+    "linen shirt for summer", "mustard maxi dress", "pastel anarkali", "denim jumpsuit",
+    "handloom cotton saree", "embroidered ethnic jacket", "boho wrap skirt", "sage green palazzo",
+    "minimalist clean neutral elegant timeless everyday comfortable relaxed fashion clothing",
+    "bohemian free-spirited earthy flowy vintage patterns everyday comfortable relaxed fashion clothing",
+    "streetwear urban edgy bold graphic casual party night out glamorous dressy fashion clothing",
+    "sophisticated elegant polished refined classic professional office formal business fashion clothing",
+    "traditional cultural vibrant patterns artisan handmade wedding event celebration formal occasion fashion clothing",
+    "retro nostalgic classic timeless antique party night out glamorous dressy fashion clothing",
+]
+
+parser = argparse.ArgumentParser(description="Memory saved vs recall@k lost for float16 / int8 FAISS storage.")
+parser.add_argument("--queries", type=int, default=500, help="how many catalog items to use as image queries")
+parser.add_argument("--text-queries", help="file with one text query per line (default: built-in list)")
+parser.add_argument("--no-text", action="store_true", help="skip text queries (avoids loading CLIP)")
+parser.add_argument("--k", type=int, default=10)
+parser.add_argument("--rerank-factor", type=int, default=4, help="candidates pulled per result when re-ranking")
+parser.add_argument("--out", help="optional path to also write the results as JSON")
+args = parser.parse_args()
+
+# 1. Load the exact float32 catalog vectors
+if os.path.exists("vectors.f32.npy"):
+    vectors = np.load("vectors.f32.npy")
+else:
+    flat = faiss.read_index("style.index")
+    if not isinstance(flat, faiss.IndexFlat):
+        print("❌ style.index is compact and there is no vectors.f32.npy. Rebuild with --rerank (or float32).")
+        exit(1)
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+
+vectors = np.ascontiguousarray(vectors, dtype='float32')
+n, dimension = vectors.shape
+print(f"📐 {n} vectors x {dimension} dims")
+
+# 2. Query sets
+# Image queries: a random sample of real catalog items.
+# A small perturbation stops every mode trivially finding the item itself at rank 1.
+rng = np.random.default_rng(0)
+sample = rng.choice(n, size=min(args.queries, n), replace=False)
+image_queries = vectors[sample] + rng.normal(0, 0.02, size=(len(sample), dimension)).astype('float32')
+image_queries /= np.linalg.norm(image_queries, axis=1, keepdims=True)
+query_sets = {"image": image_queries}
+
+# Text queries: real CLIP text embeddings, exactly what /search/text sends to FAISS
+if not args.no_text:
+    from vibe import get_text_embedding
+
+    if args.text_queries:
+        with open(args.text_queries) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = TEXT_QUERIES
+    text_vectors = [v for v in (get_text_embedding(t) for t in texts) if v is not None]
+    if text_vectors:
+        query_sets["text"] = np.ascontiguousarray(text_vectors, dtype='float32')
+    print(f"🔤 {len(text_vectors)} text queries")
+
+# 3. Ground truth from the exact index
+exact = faiss.IndexFlatIP(dimension)
+exact.add(vectors)
+truths = {name: exact.search(queries, args.k)[1] for name, queries in query_sets.items()}
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def search(index, queries, rerank):
+    depth = args.k * args.rerank_factor if rerank else args.k
+    _, I = index.search(queries, depth)
+    if not rerank:
+        return I
+    # Same as backend/search.py: exact dot products on the shortlisted rows
+    found = []
+    for q, rows in zip(queries, I):
+        rows = rows[rows >= 0]
+        scores = vectors[rows] @ q
+        found.append(rows[np.argsort(-scores)[:args.k]])
+    return found
+
+
+def measure(name, index, rerank=False):
+    result = {
+        "mode": name,
+        "index_mb": round(faiss.serialize_index(index).nbytes / 1e6, 2),
+        # The float32 side file is mmap'd: on disk, only the re-ranked rows are paged in
+        "rerank_file_mb": round(vectors.nbytes / 1e6, 2) if rerank else 0,
+    }
+    for set_name, queries in query_sets.items():
+        start = time.perf_counter()
+        found = search(index, queries, rerank)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        result[f"{set_name}_recall@{args.k}"] = round(recall_at_k(found, truths[set_name]), 4)
+        result[f"{set_name}_ms_per_query"] = round(elapsed_ms, 3)
+    return result
+
+
+def scalar_quantized(qtype):
+    index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+fp16 = scalar_quantized(faiss.ScalarQuantizer.QT_fp16)
+int8 = scalar_quantized(faiss.ScalarQuantizer.QT_8bit)
+
+results = [
+    measure("float32", exact),
+    measure("float16", fp16),
+    measure("float16+rerank", fp16, rerank=True),
+    measure("int8", int8),
+    measure("int8+rerank", int8, rerank=True),
+]
+
+# 4. Report
+baseline_mb = results[0]["index_mb"]
+recall_columns = [f"{s}_recall@{args.k}" for s in query_sets]
+print(f"\n{'mode':<16}{'index MB':>10}{'saved':>8}" + "".join(f"{c:>18}" for c in recall_columns))
+for r in results:
+    saved = 1 - r["index_mb"] / baseline_mb if baseline_mb else 0
+    r["memory_saved"] = round(saved, 4)
+    print(f"{r['mode']:<16}{r['index_mb']:>10}{saved:>8.0%}" + "".join(f"{r[c]:>18}" for c in recall_columns))
+
+if args.out:
+    with open(args.out, "w") as f:
+        json.dump({
+            "vectors": n,
+            "dimension": dimension,
+            "queries": {name: len(q) for name, q in query_sets.items()},
+            "results": results,
+        }, f, indent=2)
+    print(f"\n💾 Wrote {args.out}")
@@ -8,10 +8,18 @@ import certifi
 import os
 os.environ['SSL_CERT_FILE'] = certifi.where()
 
+try:
+    from backend.metrics import stage
+except ImportError:
+    # Standalone scripts (ml/build_index.py) run without the backend package: timing is a no-op
+    from contextlib import nullcontext as stage
+
 # Load model ONCE when this module is imported
-print("⏳ Loading CLIP Model for Vibe Engine...")
-model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+# CLIP_MODEL can point at a local directory (the benchmarks use a tiny offline one)
+CLIP_MODEL = os.environ.get("CLIP_MODEL", "openai/clip-vit-base-patch32")
+print(f"⏳ Loading CLIP Model for Vibe Engine ({CLIP_MODEL})...")
+model = CLIPModel.from_pretrained(CLIP_MODEL)
+processor = CLIPProcessor.from_pretrained(CLIP_MODEL)
 print("✅ CLIP Loaded.")
 
 # ml/vibe.py (Update just this function)
@@ -27,16 +35,19 @@ def get_average_embedding(image_urls):
     for url in image_urls:
         try:
             # Added 'headers=headers' here!
-            response = requests.get(url, headers=headers, timeout=10)
+            with stage("image_download"):
+                response = requests.get(url, headers=headers, timeout=10)
             
             if response.status_code != 200:
                 print(f"⚠️ Failed to download {url} (Status: {response.status_code})")
                 continue
                 
-            image = Image.open(BytesIO(response.content)).convert("RGB")
+            # Decode + CLIP preprocessing (resize, crop, normalize)
+            with stage("image_decode"):
+                image = Image.open(BytesIO(response.content)).convert("RGB")
+                inputs = processor(images=image, return_tensors="pt")
 
-            inputs = processor(images=image, return_tensors="pt")
-            with torch.no_grad():
+            with stage("clip_forward"), torch.no_grad():
                 emb = model.get_image_features(**inputs)
             
             vec = emb.cpu().numpy().flatten()
@@ -66,7 +77,7 @@ def get_text_embedding(text_query):
         inputs = processor(text=[text_query], return_tensors="pt", padding=True)
         
         # 2. Get Vector from CLIP Text Encoder
-        with torch.no_grad():
+        with stage("clip_text_forward"), torch.no_grad():
             text_features = model.get_text_features(**inputs)
             
         # 3. Normalize (Crucial for FAISS matching)
@@ -76,19 +87,4 @@ def get_text_embedding(text_query):
         return vec
     except Exception as e:
         print(f"❌ Error embedding text: {e}")
-        return None# remove the embedded repo from the index (so we can re-add its files normally)
-git rm --cached style-scout-aesthetics
-
-# remove the nested .git folder so the inner repo becomes a normal folder (loses inner history locally)
-rm -rf style-scout-aesthetics/.git
-
-# now add everything normally
-git add style-scout-aesthetics
-git commit -m "feat(frontend): add style-scout-aesthetics as normal folder (no submodule)"
-
-# add remote for outer repo (replace with your GitHub repo URL)
-git remote add origin <your-outer-repo-url>
-
-# set main branch and push
-git branch -M main
-git push -u origin main
\ No newline at end of file
+        return None
@@ -30,7 +30,7 @@ def scrape_store(url):
         print(f"   Found {len(products)} products.")
 
         # 3. Connect DB
-        conn = psycopg2.connect("dbname=styledb user=postgres password=postgres")
+        conn = psycopg2.connect(os.environ.get("DATABASE_URL", "dbname=styledb user=postgres password=postgres"))
         cur = conn.cursor()
 
         saved_count = 0
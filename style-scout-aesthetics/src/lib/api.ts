@@ -138,21 +138,26 @@ export const getRecommendedProductsFromQuiz = async (
 };
 
 /**
- * Get product recommendations from a Pinterest board URL
- * Uses the POST /recommend/pinterest endpoint
- * @param boardUrl - Public Pinterest board URL
+ * Status of a queued Pinterest board job
  */
-export const getRecommendationsFromPinterestBoard = async (
-  boardUrl: string
-): Promise<PinterestRecommendationResponse> => {
-  const response = await fetch(buildUrl("/recommend/pinterest"), {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify({ board_url: boardUrl }),
-  });
+export type PinterestJob = {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  cached: boolean;
+  result?: PinterestRecommendationResponse;
+  error?: string;
+};
+
+// Boards take tens of seconds to scrape and embed; poll instead of holding one request open
+const PINTEREST_POLL_INTERVAL_MS = 1500;
+const PINTEREST_POLL_TIMEOUT_MS = 3 * 60 * 1000;
 
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Read a Pinterest job response, throwing on HTTP or job errors
+ */
+const readPinterestJob = async (response: Response): Promise<PinterestJob> => {
   if (!response.ok) {
     // Try to get error text for better debugging
     let errorMessage = `Backend error ${response.status}`;
@@ -167,13 +172,50 @@ export const getRecommendationsFromPinterestBoard = async (
     throw new Error(errorMessage);
   }
 
-  const data = await response.json();
+  const job: PinterestJob = await response.json();
 
-  if (data.error) {
-    throw new Error(data.error);
+  if (job.status === "failed") {
+    throw new Error(job.error || "Could not analyze board");
   }
 
-  return data;
+  return job;
+};
+
+/**
+ * Get product recommendations from a Pinterest board URL
+ * Queues the board via POST /recommend/pinterest/jobs, then polls the job until it finishes
+ * (boards seen recently come back finished straight away)
+ * @param boardUrl - Public Pinterest board URL
+ */
+export const getRecommendationsFromPinterestBoard = async (
+  boardUrl: string
+): Promise<PinterestRecommendationResponse> => {
+  let job = await readPinterestJob(
+    await fetch(buildUrl("/recommend/pinterest/jobs"), {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ board_url: boardUrl }),
+    })
+  );
+
+  const deadline = Date.now() + PINTEREST_POLL_TIMEOUT_MS;
+  while (job.status !== "done") {
+    if (Date.now() > deadline) {
+      throw new Error("Timed out waiting for board analysis");
+    }
+    await sleep(PINTEREST_POLL_INTERVAL_MS);
+    job = await readPinterestJob(
+      await fetch(buildUrl(`/recommend/pinterest/jobs/${job.job_id}`))
+    );
+  }
+
+  if (!job.result) {
+    throw new Error("Board analysis returned no result");
+  }
+
+  return job.result;
 };
 
 /**
@@ -0,0 +1,114 @@
+# tests/test_jobs.py
+import threading
+import pytest
+import backend.jobs as jobs
+from backend.jobs import BoardJobs, BoardJobError, QueueFull, board_key
+from backend.metrics import stage
+
+BOARD = "https://www.pinterest.com/someone/summer-fits/"
+
+
+class FakeBoard:
+    """compute_vibe stand-in: counts scrapes and can be held until release()."""
+
+    def __init__(self, block=False, error=None):
+        self.calls = 0
+        self.error = error
+        self.gate = threading.Event()
+        if not block:
+            self.gate.set()
+
+    def release(self):
+        self.gate.set()
+
+    def __call__(self, board_url):
+        self.calls += 1
+        self.gate.wait(5)
+        with stage("browser_scrape"):
+            pass
+        if self.error:
+            raise self.error
+        return {"pins": [board_url], "vibe_vector": [1.0]}
+
+
+def recommend(vibe):
+    return {"pins_analyzed": len(vibe["pins"]), "results": []}
+
+
+def finished(job):
+    assert job.wait(5), "job never finished"
+    return job
+
+
+def test_board_key_ignores_host_case_www_trailing_slash_and_query():
+    assert board_key("https://www.Pinterest.com/Someone/Summer-Fits/?invite_code=x") == "pinterest.com/someone/summer-fits"
+    assert board_key("  https://pinterest.com/someone/summer-fits  ") == "pinterest.com/someone/summer-fits"
+    assert board_key("https://pinterest.com/someone/other") != board_key(BOARD)
+
+
+def test_job_runs_and_reports_its_own_stages():
+    board = FakeBoard()
+    job = finished(BoardJobs(board, recommend).submit(BOARD))
+
+    assert job.status == "done"
+    assert job.result == {"pins_analyzed": 1, "results": []}
+    body = job.to_dict()
+    assert "browser_scrape" in body["stages"]
+    assert body["result"] == job.result
+
+
+def test_concurrent_submissions_of_one_board_share_a_job():
+    board = FakeBoard(block=True)
+    board_jobs = BoardJobs(board, recommend)
+
+    first = board_jobs.submit(BOARD)
+    second = board_jobs.submit("https://pinterest.com/someone/summer-fits?utm=share")
+    assert second is first
+
+    board.release()
+    finished(first)
+    assert board.calls == 1
+
+
+def test_finished_board_is_served_from_cache_until_the_ttl(monkeypatch):
+    board = FakeBoard()
+    board_jobs = BoardJobs(board, recommend)
+    finished(board_jobs.submit(BOARD))
+
+    cached = board_jobs.submit(BOARD)
+    assert cached.cached and cached.status == "done"
+    assert board.calls == 1
+
+    # Expired: the board is scraped again
+    expires_at = board_jobs.cache[board_key(BOARD)][0]
+    monkeypatch.setattr(jobs.time, "time", lambda: expires_at + 1)
+    fresh = finished(board_jobs.submit(BOARD))
+    assert not fresh.cached
+    assert board.calls == 2
+
+
+def test_queue_full_turns_new_boards_away(monkeypatch):
+    monkeypatch.setattr(jobs, "PINTEREST_MAX_PENDING", 1)
+    board = FakeBoard(block=True)
+    board_jobs = BoardJobs(board, recommend)
+
+    board_jobs.submit(BOARD)
+    with pytest.raises(QueueFull):
+        board_jobs.submit("https://pinterest.com/someone/another-board")
+    # The board already in progress can still be joined
+    assert board_jobs.submit(BOARD).status in ("queued", "running")
+    board.release()
+
+
+def test_failures_keep_their_status_code_and_are_not_cached():
+    board = FakeBoard(error=BoardJobError("Board is private", 422))
+    board_jobs = BoardJobs(board, recommend)
+
+    job = finished(board_jobs.submit(BOARD))
+    assert job.status == "failed"
+    assert job.error_status == 422
+    assert job.to_dict()["error"] == "Board is private"
+    assert board_jobs.cache == {}
+
+    crash = finished(BoardJobs(FakeBoard(error=RuntimeError("chrome died")), recommend).submit(BOARD))
+    assert crash.error_status == 500
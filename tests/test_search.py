@@ -0,0 +1,71 @@
+# tests/test_search.py
+import numpy as np
+import pytest
+from backend.search import reciprocal_rank_fusion, vector_search, load_rerank_vectors, RRF_K
+
+
+def test_rrf_rewards_items_ranked_by_both_legs():
+    visual = [1, 2, 3]
+    lexical = [3, 4]
+    fused = [pid for pid, _ in reciprocal_rank_fusion([visual, lexical])]
+    # 3 is in both lists, so it beats 1 which only tops one of them
+    assert fused[0] == 3
+    assert set(fused) == {1, 2, 3, 4}
+
+
+def test_rrf_scores_only_depend_on_rank():
+    fused = dict(reciprocal_rank_fusion([[10, 20], [20]]))
+    assert fused[10] == 1 / (RRF_K + 1)
+    assert fused[20] == 1 / (RRF_K + 2) + 1 / (RRF_K + 1)
+
+
+def test_rrf_with_one_empty_leg_keeps_the_other_order():
+    assert [pid for pid, _ in reciprocal_rank_fusion([[], [7, 8, 9]])] == [7, 8, 9]
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+class FakeIndex:
+    """Stands in for a compact FAISS index: returns fixed (approximate) rows and scores."""
+
+    def __init__(self, rows, scores):
+        self.rows = rows
+        self.scores = scores
+
+    def search(self, query, k):
+        rows = (self.rows + [-1] * k)[:k]
+        scores = (self.scores + [0.0] * k)[:k]
+        return np.array([scores], dtype='float32'), np.array([rows])
+
+
+def test_vector_search_maps_rows_to_ids_and_drops_padding():
+    index = FakeIndex(rows=[1, 0], scores=[0.9, 0.8])
+    hits = vector_search(index, ["a", "b"], np.ones(2), k=4)
+    assert hits == [("b", pytest.approx(0.9)), ("a", pytest.approx(0.8))]
+
+
+def test_vector_search_rerank_reorders_by_exact_score():
+    # The compact index thinks row 0 is best, but the exact vectors say row 2 is
+    exact = np.array([[0.5, 0.0], [0.1, 0.0], [1.0, 0.0]], dtype='float32')
+    index = FakeIndex(rows=[0, 1, 2], scores=[0.9, 0.8, 0.7])
+    hits = vector_search(index, ["a", "b", "c"], np.array([1.0, 0.0]), k=2, rerank_vectors=exact, rerank_factor=2)
+    assert [pid for pid, _ in hits] == ["c", "a"]
+    assert [score for _, score in hits] == [pytest.approx(1.0), pytest.approx(0.5)]
+
+
+def test_vector_search_rerank_reads_from_memmap(tmp_path):
+    path = tmp_path / "vectors.f32.npy"
+    np.save(path, np.array([[0.2, 0.0], [0.8, 0.0]], dtype='float32'))
+    index = FakeIndex(rows=[0, 1], scores=[0.9, 0.1])
+    index.ntotal = 2
+    rerank_vectors = load_rerank_vectors(str(path), index)
+    hits = vector_search(index, [10, 11], np.array([1.0, 0.0]), k=1, rerank_vectors=rerank_vectors)
+    assert hits == [(11, pytest.approx(0.8))]
+
+
+def test_load_rerank_vectors_ignores_out_of_sync_file(tmp_path):
+    path = tmp_path / "vectors.f32.npy"
+    np.save(path, np.zeros((3, 2), dtype='float32'))
+    index = FakeIndex(rows=[], scores=[])
+    index.ntotal = 5
+    assert load_rerank_vectors(str(path), index) is None
+    assert load_rerank_vectors(str(tmp_path / "missing.npy"), index) is None
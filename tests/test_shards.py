@@ -0,0 +1,76 @@
+# tests/test_shards.py
+import time
+import pytest
+import backend.shards as shards
+from backend.shards import ShardCoordinator, ShardUnavailable
+
+
+class FakeShard:
+    """Returns fixed hits, optionally after a delay or by raising."""
+
+    def __init__(self, name, hits=(), delay=0, error=None):
+        self.name = name
+        self.hits = list(hits)
+        self.delay = delay
+        self.error = error
+
+    def describe(self):
+        return {"name": self.name}
+
+    def search(self, query_vec, k):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.hits[:k]
+
+
+def test_merge_keeps_the_global_best_k_across_shards():
+    coordinator = ShardCoordinator([
+        FakeShard("a", [(1, 0.9), (2, 0.5), (3, 0.1)]),
+        FakeShard("b", [(4, 0.8), (5, 0.7), (6, 0.2)]),
+    ])
+    hits, report = coordinator.search(None, k=3)
+
+    assert hits == [(1, 0.9), (4, 0.8), (5, 0.7)]
+    assert report["total"] == report["answered"] == 2
+    assert not report["partial"]
+    assert report["failed"] == {}
+    assert set(report["latency_ms"]) == {"a", "b"}
+
+
+def test_timeout_and_error_are_reported_separately(monkeypatch):
+    monkeypatch.setattr(shards, "SHARD_TIMEOUT_SECONDS", 0.2)
+    coordinator = ShardCoordinator([
+        FakeShard("ok", [(1, 0.9)]),
+        FakeShard("slow", [(2, 0.99)], delay=1),
+        FakeShard("broken", error=RuntimeError("boom")),
+    ])
+    hits, report = coordinator.search(None, k=10)
+
+    # The slow shard's better hit is dropped, not waited for
+    assert hits == [(1, 0.9)]
+    assert report["answered"] == 1
+    assert report["partial"]
+    assert report["failed"] == {"slow": "timeout", "broken": "error"}
+    assert list(report["latency_ms"]) == ["ok"]
+
+
+def test_all_shards_failing_raises_with_the_report(monkeypatch):
+    monkeypatch.setattr(shards, "SHARD_TIMEOUT_SECONDS", 0.2)
+    coordinator = ShardCoordinator([
+        FakeShard("slow", delay=1),
+        FakeShard("broken", error=RuntimeError("boom")),
+    ])
+    with pytest.raises(ShardUnavailable) as raised:
+        coordinator.search(None, k=10)
+
+    report = raised.value.report
+    assert report["total"] == 2
+    assert report["answered"] == 0
+    assert report["failed"] == {"slow": "timeout", "broken": "error"}
+
+
+def test_empty_shards_are_not_failures():
+    hits, report = ShardCoordinator([FakeShard("a"), FakeShard("b")]).search(None, k=5)
+    assert hits == []
+    assert report["answered"] == 2